@@ -30,6 +30,7 @@ NAVER_LOGIN_URL    = "https://nid.naver.com/nidlogin.login"
 NAVER_LOGIN_DOMAIN = "nid.naver.com"
 MY_BLOG_ALIAS_URL  = "https://blog.naver.com/MyBlog.naver"
 EXPORT_URL_TPL     = "https://admin.blog.naver.com/{}/config/postexport"
+POST_URL_TPL       = "https://blog.naver.com/{}/{}"  # 포스트 정규 URL (blogId, logNo)
 IFRAME_SELECTOR    = "#papermain"
 POST_ROW_SELECTOR  = "#post_list_body tr[class*='postlist']"
 PAGE_LINK_SELECTOR = "a.page"
@@ -288,26 +289,21 @@ async def main():
                 page_meta_data = await frame.evaluate("""
                     (args) => {
                         const selector = args[0];
-                        const blogId = args[1];
                         const rows = document.querySelectorAll(selector);
                         const data = [];
                         rows.forEach(row => {
                             const logno = row.getAttribute('logno');
                             const dateEl = row.querySelector('td.tc span.num.add_date');
                             const titleLink = row.querySelector('span.txt.title a');
-                            let url = null;
-                            if (titleLink) { url = titleLink.href; }
-                            else if (logno && blogId) { url = `https://blog.naver.com/${blogId}/${logno}`; }
                             data.push({
                                 logno: logno,
                                 date: dateEl ? dateEl.textContent.trim() : null,
-                                title: titleLink ? titleLink.innerText.trim() : '제목 없음',
-                                url: url
+                                title: titleLink ? titleLink.innerText.trim() : '제목 없음'
                             });
                         });
                         return data;
                     }
-                """, [POST_ROW_SELECTOR, blog_id])
+                """, [POST_ROW_SELECTOR])
 
                 print(f"  - 현재 페이지에서 {len(page_meta_data)}개의 행 데이터 발견 (evaluate)")
                 found_new = 0
@@ -315,12 +311,12 @@ async def main():
                     logno = item.get('logno')
                     date_str = item.get('date')
                     title = item.get('title', '제목 없음')
-                    url = item.get('url')
                     if not logno: continue
                     if not date_str: date_str = "날짜 없음"
-                    if not url: url = f"https://blog.naver.com/{blog_id}/{logno}"
+                    # 제목 링크(href) 대신 항상 정규 URL 사용 (결과 저장소가 blogId + logNo로 재구성)
+                    url = POST_URL_TPL.format(blog_id, logno)
                     if not any(p["logNo"] == logno for p in all_meta):
-                        all_meta.append({"logNo": logno, "title": title, "url": url, "date": date_str})
+                        all_meta.append({"blogId": blog_id, "logNo": logno, "title": title, "url": url, "date": date_str})
                         print(f"    ✓ 수집: {logno} - {title[:30]}...")
                         found_new += 1
                         if MAX_POSTS_TO_COLLECT and len(all_meta) >= MAX_POSTS_TO_COLLECT:
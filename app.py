@@ -1,13 +1,16 @@
 # app.py
 import os
 import uuid # Job ID 생성용
-import threading
 import asyncio
 import json
-import time
-from flask import Flask, request, jsonify, Response, stream_with_context
-import requests
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+import httpx
+import uvicorn
 from dotenv import load_dotenv # .env 파일 로딩용 (로컬 테스트)
+from result_store import JobResultStore
 
 # .env 파일 로드 (Railway 환경 변수가 우선 적용됨)
 load_dotenv()
@@ -26,127 +29,207 @@ except ImportError:
         await asyncio.sleep(1)
         return [{"error": "스크래퍼 모듈 로드 실패"}]
 
-app = Flask(__name__)
+# SSE 연결 유지용 주석(keep-alive) 전송 간격 (초)
+SSE_KEEPALIVE_SEC = 15
+# 종료 신호 후 열린 연결이 닫히기를 기다리는 최대 시간 (초). 넘으면 남은 요청을 취소하고 종료
+GRACEFUL_SHUTDOWN_SEC = 10
+# Replit 콜백 요청 타임아웃 (초)
+CALLBACK_TIMEOUT_SEC = 30
+# 완료된 작업 결과를 메모리에 보관할 최대 크기 (MB). 초과분은 오래된 순서로 디스크에 저장
+RESULT_MEMORY_BUDGET_MB = int(os.environ.get("RESULT_MEMORY_BUDGET_MB", 64))
+# 디스크 저장 위치 (이 아래에 프로세스별 임시 폴더를 만듦). 없으면 시스템 임시 폴더 사용
+RESULT_SPILL_DIR = os.environ.get("RESULT_SPILL_DIR") or None
+# 끝난 작업(완료/오류)의 상태와 결과를 보관할 최대 개수. 넘으면 가장 오래전에 끝난 작업부터 삭제
+MAX_FINISHED_JOBS = int(os.environ.get("MAX_FINISHED_JOBS", 500))
 
 # --- 상태 및 결과 저장을 위한 임시 메모리 저장소 ---
 # 주의: 서버 재시작 시 모든 데이터가 사라집니다!
 # 실제 서비스에서는 Redis, DB 등으로 교체해야 합니다.
-scrape_jobs = {} # job_id를 키로 사용
+# 모든 작업과 SSE 스트림이 하나의 이벤트 루프에서 돌기 때문에 별도의 락은 필요 없습니다.
+# (단, 저장소가 프로세스 메모리에 있으므로 워커는 반드시 1개로 실행해야 합니다.)
+scrape_jobs = {} # job_id를 키로 사용 (상태 정보만 보관, 결과는 result_store에 저장. 끝난 작업은 MAX_FINISHED_JOBS개까지)
+result_store = None # 완료된 작업 결과 저장소 (lifespan에서 생성, 스필 폴더도 이때 만듦)
+job_events = {} # job_id -> asyncio.Event (상태가 바뀔 때마다 set 후 새 Event로 교체)
+finished_jobs = OrderedDict() # 끝난 작업 ID (앞쪽일수록 오래전에 끝난 작업)
+background_tasks = set() # 실행 중인 스크래핑 Task (GC로 사라지지 않도록 참조 유지)
+http_client = None # 콜백 전송용 httpx.AsyncClient (lifespan에서 생성)
+shutdown_event = asyncio.Event() # 서버 종료 시작 알림 (열려 있는 상태 스트림을 닫기 위함)
+
+TERMINAL_STATUSES = ("completed", "error")
+
+def update_job(job_id, **fields):
+    """작업 상태를 갱신하고, 해당 작업의 상태 스트림을 기다리는 모든 watcher를 깨웁니다."""
+    scrape_jobs[job_id].update(fields)
+    event = job_events.pop(job_id, None)
+    if event:
+        event.set()
+    # 종료 상태가 아니면 다음 변경을 기다릴 새 Event 준비
+    if scrape_jobs[job_id]["status"] not in TERMINAL_STATUSES:
+        job_events[job_id] = asyncio.Event()
+
+def retire_job(job_id):
+    """끝난 작업을 보관 목록에 올리고, 보관 개수를 넘어 상태가 삭제된 작업 ID 목록을 반환합니다."""
+    finished_jobs[job_id] = None
+    expired_ids = []
+    while len(finished_jobs) > MAX_FINISHED_JOBS:
+        expired_id, _ = finished_jobs.popitem(last=False)
+        scrape_jobs.pop(expired_id, None)
+        expired_ids.append(expired_id)
+    return expired_ids
+
+def request_shutdown():
+    """서버 종료가 시작되면 열려 있는 모든 상태 스트림을 깨워 종료 프레임을 보내고 닫게 합니다."""
+    shutdown_event.set()
+    for event in job_events.values():
+        event.set()
+
+@asynccontextmanager
+async def lifespan(app):
+    """서버 시작 시 공용 HTTP 클라이언트와 결과 저장소를 만들고, 종료 시 남은 작업과 함께 정리합니다."""
+    global http_client, result_store
+    shutdown_event.clear()
+    http_client = httpx.AsyncClient(timeout=CALLBACK_TIMEOUT_SEC)
+    result_store = JobResultStore(RESULT_MEMORY_BUDGET_MB * 1024 * 1024, RESULT_SPILL_DIR)
+    try:
+        yield
+    finally:
+        request_shutdown()
+        for task in list(background_tasks):
+            task.cancel()
+        if background_tasks:
+            await asyncio.gather(*background_tasks, return_exceptions=True)
+        await http_client.aclose()
+        http_client = None
+        await asyncio.to_thread(result_store.close)
+        result_store = None
+
+app = FastAPI(lifespan=lifespan)
+
+# --- Replit 콜백 전송 함수 ---
+async def send_result_callback(job_id, scrape_result_data):
+    replit_callback_url = os.environ.get("REPLIT_CALLBACK_URL")
+    replit_secret_key = os.environ.get("REPLIT_SECRET_KEY")
+
+    if not (replit_callback_url and replit_secret_key):
+        logger.warning(f"[{job_id}] Replit 콜백 URL 또는 Secret Key가 설정되지 않아 결과 전송 생략.")
+        return
+
+    logger.info(f"[{job_id}] 스크래핑 결과 Replit으로 전송 시도...")
+    try:
+        payload = {
+            # 'user_id': scrape_jobs[job_id].get('user_id'), # 필요하다면 user_id도 포함
+            'job_id': job_id,
+            'result': scrape_result_data
+        }
+        headers = {
+            'Content-Type': 'application/json',
+            'X-Scraper-Secret': replit_secret_key
+        }
+        response = await http_client.post(replit_callback_url, json=payload, headers=headers)
+        if response.status_code == 200:
+            logger.info(f"[{job_id}] 결과 전송 성공: {response.status_code}")
+        else:
+            logger.error(f"[{job_id}] 결과 전송 실패: {response.status_code} - {response.text[:100]}")
+    except Exception as callback_err:
+        logger.error(f"[{job_id}] 결과 전송 중 오류: {callback_err}")
 
-# --- 스크래핑 백그라운드 작업 함수 ---
-def run_scrape_task(job_id):
-    global scrape_jobs
+# --- 스크래핑 백그라운드 작업 함수 (서버 이벤트 루프의 Task로 실행) ---
+async def run_scrape_task(job_id):
+    try:
+        await run_scrape_job(job_id)
+    finally:
+        # 보관 개수를 넘은 오래된 작업은 결과(메모리/디스크)까지 함께 삭제
+        expired_ids = retire_job(job_id)
+        if expired_ids:
+            logger.info(f"보관 개수({MAX_FINISHED_JOBS}) 초과로 오래된 작업 {len(expired_ids)}개 삭제")
+            await asyncio.to_thread(result_store.discard, expired_ids)
+
+async def run_scrape_job(job_id):
     logger.info(f"[{job_id}] 백그라운드 스크래핑 작업 시작.")
 
     # 상태 업데이트: 진행 중
-    scrape_jobs[job_id] = {"status": "running", "message": "스크래핑 초기화 중...", "progress": 5, "result": None}
+    update_job(job_id, status="running", message="스크래핑 초기화 중...", progress=5)
 
     try:
         # --- 상태 업데이트: 로그인 단계 (예시) ---
-        scrape_jobs[job_id]["message"] = "네이버 로그인 처리 중..."
-        scrape_jobs[job_id]["progress"] = 10
+        update_job(job_id, message="네이버 로그인 처리 중...", progress=10)
         # 여기서 BlogScraper.py 내부의 로그인 관련 로직이 실행된다고 가정
         # 실제 진행률 업데이트는 BlogScraper.py 수정 필요
 
-        # --- asyncio 이벤트 루프 생성 및 스크래퍼 실행 ---
-        # 참고: Flask + Threading + Asyncio는 복잡할 수 있음. FastAPI가 더 적합.
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        # 실제 스크래핑 함수 호출
+        # 실제 스크래핑 함수 호출 (별도 스레드/루프 없이 서버 루프에서 바로 await)
         # BlogScraper.py의 main()이 최종 결과 리스트를 반환해야 함
-        scrape_result_data = loop.run_until_complete(run_actual_scraper())
-        loop.close()
+        scrape_result_data = await run_actual_scraper()
 
         # --- 상태 업데이트: 완료 ---
         if isinstance(scrape_result_data, list):
-            scrape_jobs[job_id].update({
-                "status": "completed",
-                "message": f"스크래핑 완료 ({len(scrape_result_data)}개 포스트 수집)",
-                "progress": 100,
-                "result": scrape_result_data # 결과를 임시 저장소에 저장
-            })
+            # 결과는 압축 레코드로 저장소에 저장 (메모리 예산 초과 시 디스크로 이동)
+            await asyncio.to_thread(result_store.put, job_id, scrape_result_data)
+            update_job(
+                job_id,
+                status="completed",
+                message=f"스크래핑 완료 ({len(scrape_result_data)}개 포스트 수집)",
+                progress=100
+            )
             logger.info(f"[{job_id}] 스크래핑 완료. 결과 저장됨.")
 
-            # --- 결과 Replit으로 전송 ---
-            replit_callback_url = os.environ.get("REPLIT_CALLBACK_URL")
-            replit_secret_key = os.environ.get("REPLIT_SECRET_KEY")
-
-            if replit_callback_url and replit_secret_key:
-                logger.info(f"[{job_id}] 스크래핑 결과 Replit으로 전송 시도...")
-                try:
-                    payload = {
-                        # 'user_id': scrape_jobs[job_id].get('user_id'), # 필요하다면 user_id도 포함
-                        'job_id': job_id,
-                        'result': scrape_result_data
-                    }
-                    headers = {
-                        'Content-Type': 'application/json',
-                        'X-Scraper-Secret': replit_secret_key
-                    }
-                    response = requests.post(replit_callback_url, json=payload, headers=headers, timeout=30)
-                    if response.status_code == 200:
-                        logger.info(f"[{job_id}] 결과 전송 성공: {response.status_code}")
-                    else:
-                        logger.error(f"[{job_id}] 결과 전송 실패: {response.status_code} - {response.text[:100]}")
-                except Exception as callback_err:
-                    logger.error(f"[{job_id}] 결과 전송 중 오류: {callback_err}")
-            else:
-                logger.warning(f"[{job_id}] Replit 콜백 URL 또는 Secret Key가 설정되지 않아 결과 전송 생략.")
-
         else:
             raise Exception("스크래퍼 함수가 유효한 리스트 결과를 반환하지 않았습니다.")
 
+    except asyncio.CancelledError:
+        logger.warning(f"[{job_id}] 서버 종료로 스크래핑 작업 취소됨.")
+        update_job(job_id, status="error", message="서버 종료로 작업이 취소되었습니다.", progress=-1)
+        raise
     except Exception as e:
         error_message = f"스크래핑 작업 중 오류: {str(e)}"
         logger.error(f"[{job_id}] {error_message}")
         # traceback.print_exc() # 상세 오류 로깅 필요시 주석 해제
-        scrape_jobs[job_id].update({
-            "status": "error",
-            "message": error_message,
-            "progress": -1,
-            "result": None
-        })
+        update_job(job_id, status="error", message=error_message, progress=-1)
+        return
+
+    # --- 결과 Replit으로 전송 ---
+    # 이미 완료된 작업이므로, 전송 중 서버 종료로 취소되더라도 작업 상태는 바꾸지 않음
+    await send_result_callback(job_id, scrape_result_data)
 
 # --- API 엔드포인트 ---
 
-@app.route('/')
-def home():
+@app.get('/', response_class=PlainTextResponse)
+async def home():
     """서버 상태 확인용 기본 엔드포인트"""
     return "안녕하세요! 데이지 스크래퍼 서버가 작동 중입니다. 😊"
 
-@app.route('/start-scrape', methods=['POST'])
-def start_scrape_endpoint():
+@app.post('/start-scrape', status_code=202)
+async def start_scrape_endpoint():
     """Replit 앱으로부터 스크래핑 시작 요청을 받습니다."""
-    global scrape_jobs
     # 요청 데이터에서 user_id 가져오기 (선택적)
-    # user_id = request.json.get('user_id')
+    # user_id = (await request.json()).get('user_id')
 
     # 고유 작업 ID 생성
     job_id = str(uuid.uuid4())
     logger.info(f"스크래핑 요청 수신. Job ID 생성: {job_id}")
 
     # 작업 상태 초기화
-    scrape_jobs[job_id] = {"status": "pending", "message": "스크래핑 대기 중...", "progress": 0, "result": None}
+    scrape_jobs[job_id] = {"status": "pending", "message": "스크래핑 대기 중...", "progress": 0}
+    job_events[job_id] = asyncio.Event()
     # if user_id: scrape_jobs[job_id]['user_id'] = user_id # 필요시 사용자 ID 저장
 
-    # 백그라운드 스레드에서 스크래핑 작업 시작
-    thread = threading.Thread(target=run_scrape_task, args=(job_id,))
-    thread.daemon = True # 메인 스레드 종료 시 함께 종료
-    thread.start()
+    # 서버 이벤트 루프에 스크래핑 Task 등록
+    task = asyncio.create_task(run_scrape_task(job_id))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
 
     # Replit 앱에는 작업 ID와 함께 수락되었음을 알림
-    return jsonify({"message": "스크래핑 작업이 시작되었습니다.", "job_id": job_id}), 202
+    return {"message": "스크래핑 작업이 시작되었습니다.", "job_id": job_id}
 
-@app.route('/status/<job_id>')
-def status_endpoint(job_id):
+@app.get('/status/{job_id}')
+async def status_endpoint(job_id: str):
     """특정 작업 ID의 진행 상태를 SSE(Server-Sent Events)로 스트리밍합니다."""
-    global scrape_jobs
     logger.info(f"[{job_id}] 상태 확인 요청 수신")
 
-    def event_stream():
+    async def event_stream():
         last_status_json = None
         while True:
+            # 상태를 읽기 전에 Event를 먼저 잡아둬야 그 사이의 변경을 놓치지 않음
+            event = job_events.get(job_id)
             job_info = scrape_jobs.get(job_id)
             if not job_info:
                 # 작업 ID가 유효하지 않은 경우
@@ -155,7 +238,7 @@ def status_endpoint(job_id):
                 logger.warning(f"[{job_id}] 유효하지 않은 작업 ID로 상태 확인 시도")
                 break
 
-            current_status = {k: v for k, v in job_info.items() if k != 'result'} # 결과 데이터 제외
+            current_status = dict(job_info)
             current_status_json = json.dumps(current_status)
 
             # 상태가 변경되었을 때만 전송
@@ -165,34 +248,59 @@ def status_endpoint(job_id):
                 logger.debug(f"[{job_id}] 상태 업데이트 전송: {current_status}")
 
             # 작업이 완료되거나 오류 발생 시 스트림 종료
-            if job_info["status"] in ["completed", "error"]:
+            if job_info["status"] in TERMINAL_STATUSES or event is None:
                 logger.info(f"[{job_id}] 상태 스트림 종료 (상태: {job_info['status']})")
                 break
 
-            # 2초 간격으로 확인
-            time.sleep(2)
+            # 서버 종료 중이면 마지막 프레임을 보내고 연결을 닫음 (열린 스트림이 종료를 막지 않도록)
+            if shutdown_event.is_set():
+                shutdown_data = {"status": "error", "message": "서버가 종료되어 상태 스트림을 닫습니다.", "progress": -1}
+                yield f"data: {json.dumps(shutdown_data)}\n\n"
+                logger.info(f"[{job_id}] 서버 종료로 상태 스트림 종료")
+                break
+
+            # 폴링 대신 상태 변경 알림을 기다림 (변경이 없으면 keep-alive 주석 전송)
+            try:
+                await asyncio.wait_for(event.wait(), timeout=SSE_KEEPALIVE_SEC)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
 
     # SSE 응답 반환
-    return Response(stream_with_context(event_stream()), mimetype="text/event-stream")
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
 
-@app.route('/result/<job_id>', methods=['GET'])
-def get_result_endpoint(job_id):
+@app.get('/result/{job_id}')
+async def get_result_endpoint(job_id: str):
     """(선택적) 완료된 작업의 결과를 직접 가져오는 엔드포인트"""
-    global scrape_jobs
     job_info = scrape_jobs.get(job_id)
 
     if not job_info:
-        return jsonify({"error": "유효하지 않은 작업 ID입니다."}), 404
+        return JSONResponse({"error": "유효하지 않은 작업 ID입니다."}, status_code=404)
 
     if job_info["status"] == "completed":
-        return jsonify({"job_id": job_id, "status": "completed", "result": job_info.get("result")})
+        # 디스크로 내려간 결과라면 여기서 다시 읽어옴
+        result = await asyncio.to_thread(result_store.get, job_id)
+        if result is None:
+            return JSONResponse({"job_id": job_id, "status": "error", "error": "작업 결과를 더 이상 불러올 수 없습니다."}, status_code=410)
+        return JSONResponse({"job_id": job_id, "status": "completed", "result": result})
     elif job_info["status"] == "error":
-        return jsonify({"job_id": job_id, "status": "error", "message": job_info.get("message")}), 500
+        return JSONResponse({"job_id": job_id, "status": "error", "message": job_info.get("message")}, status_code=500)
     else:
-        return jsonify({"job_id": job_id, "status": job_info.get("status"), "message": "작업이 아직 진행 중입니다."}), 202
+        return JSONResponse({"job_id": job_id, "status": job_info.get("status"), "message": "작업이 아직 진행 중입니다."}, status_code=202)
+
+class ScraperServer(uvicorn.Server):
+    """종료 신호를 받으면 열린 연결을 기다리기 전에 상태 스트림부터 닫도록 알리는 uvicorn 서버"""
+
+    def handle_exit(self, sig, frame):
+        # uvicorn은 열린 연결이 모두 닫힌 뒤에야 lifespan 종료를 실행하므로, 여기서 먼저 알려야 함
+        try:
+            asyncio.get_running_loop().call_soon_threadsafe(request_shutdown)
+        except RuntimeError:
+            pass
+        super().handle_exit(sig, frame)
 
 if __name__ == '__main__':
     # Railway는 PORT 환경 변수를 사용. 로컬 테스트 시 기본 8080 사용.
     port = int(os.environ.get('PORT', 8080))
-    # debug=True는 로컬 테스트 시에만 유용. 실제 배포 시에는 False 권장.
-    app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
+    # 작업 저장소가 프로세스 메모리에 있으므로 workers는 1로 유지해야 합니다.
+    config = uvicorn.Config(app, host='0.0.0.0', port=port, workers=1, timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_SEC)
+    ScraperServer(config).run()
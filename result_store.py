@@ -0,0 +1,263 @@
+# result_store.py
+import os
+import re
+import sys
+import json
+import zlib
+import pickle
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import logging
+logger = logging.getLogger(__name__)
+
+POST_URL_TPL = "https://blog.naver.com/{}/{}"
+BLOG_ID_PATTERN = re.compile(r"blog\.naver\.com/([^/?&#]+)/")
+CONTENT_COMPRESS_LEVEL = 6
+RECORD_FIELDS = ("blogId", "logNo", "title", "url", "date", "content")
+SPILL_LOAD_ERRORS = (OSError, EOFError, ValueError, pickle.UnpicklingError)
+
+# 입력 dict의 키 순서 튜플 (구성이 같은 레코드끼리 하나의 튜플을 공유)
+_KEY_LAYOUTS = {}
+
+@dataclass(slots=True)
+class CompactPost:
+    """본문을 zlib으로 압축해 보관하는 포스트 레코드 (url은 blogId + logNo로 재구성)"""
+    keys: tuple # 입력에 있던 키 (to_dict는 이 키만 같은 순서로 돌려줌)
+    blogId: str | None = None
+    logNo: str | None = None
+    title: str | None = None
+    date: str | None = None
+    content_z: bytes | None = None
+    extra: dict | None = None # 위 필드 외의 키 (예: 스크래퍼 로드 실패 시 "error"), 또는 재구성 값이 입력과 다른 필드
+
+    @property
+    def content(self):
+        if self.content_z is None:
+            return None
+        return zlib.decompress(self.content_z).decode("utf-8")
+
+    @property
+    def url(self):
+        if not (self.blogId and self.logNo):
+            return None
+        return POST_URL_TPL.format(self.blogId, self.logNo)
+
+    @property
+    def nbytes(self):
+        """메모리 예산 계산용 대략적인 크기 (바이트)"""
+        # 문자열은 sys.getsizeof가 UTF-8 캐시 생성 여부에 따라 달라지므로 인코딩 길이로 계산
+        size = sys.getsizeof(self)
+        for value in (self.blogId, self.logNo, self.title, self.date):
+            if value is not None:
+                size += len(str(value).encode("utf-8"))
+        if self.content_z is not None:
+            size += len(self.content_z)
+        if self.extra:
+            size += len(json.dumps(self.extra, ensure_ascii=False).encode("utf-8"))
+        return size
+
+    @classmethod
+    def from_dict(cls, post):
+        """스크래퍼가 반환한 포스트 dict를 CompactPost로 변환합니다."""
+        original = post
+        post = dict(post)
+        keys = tuple(post)
+        keys = _KEY_LAYOUTS.setdefault(keys, keys)
+        url = post.pop("url", None)
+        blog_id = post.pop("blogId", None)
+        if not blog_id and url:
+            m = BLOG_ID_PATTERN.search(url)
+            if m: blog_id = m.group(1)
+        content = post.pop("content", None)
+        record = cls(
+            keys=keys,
+            blogId=blog_id,
+            logNo=post.pop("logNo", None),
+            title=post.pop("title", None),
+            date=post.pop("date", None),
+            content_z=None if content is None else zlib.compress(content.encode("utf-8"), CONTENT_COMPRESS_LEVEL),
+        )
+        # 재구성 값이 입력과 다른 필드(blogId + logNo와 맞지 않는 url 등)는 원래 값을 그대로 보관
+        # (content는 zlib이 무손실이므로 비교하지 않음)
+        for key in RECORD_FIELDS:
+            if key == "content":
+                continue
+            if key in original and getattr(record, key) != original[key]:
+                post[key] = original[key]
+        record.extra = post or None
+        return record
+
+    def to_dict(self):
+        """API 응답/콜백용 dict로 되돌립니다. (입력에 있던 키만 같은 순서로 포함)"""
+        data = {}
+        for key in self.keys:
+            if self.extra and key in self.extra:
+                data[key] = self.extra[key]
+            else:
+                data[key] = getattr(self, key)
+        return data
+
+
+def result_nbytes(records):
+    """작업 결과(CompactPost 리스트)가 메모리 예산에서 차지하는 대략적인 크기 (바이트)"""
+    return sys.getsizeof(records) + sum(record.nbytes for record in records)
+
+
+class JobResultStore:
+    """완료된 작업 결과를 메모리 예산 안에서 보관하고, 초과분은 LRU 순서로 디스크에 내립니다.
+
+    디스크로 내려간 결과는 get() 호출 시 다시 읽어 메모리에 올립니다.
+    스필 파일은 프로세스마다 새로 만드는 임시 폴더에 압축 레코드 그대로(pickle) 저장하며, discard()/close()로 지웁니다.
+    여러 스레드(asyncio.to_thread)에서 호출될 수 있으므로 내부 상태는 락으로 보호하고,
+    파일 입출력은 락 밖에서 수행해 메모리에 있는 결과 조회가 디스크 작업을 기다리지 않게 합니다.
+    """
+
+    def __init__(self, memory_budget, spill_root=None):
+        self.memory_budget = memory_budget
+        if spill_root:
+            os.makedirs(spill_root, exist_ok=True)
+        self.spill_dir = tempfile.mkdtemp(prefix="daisy_results_", dir=spill_root)
+        self._cache = OrderedDict() # job_id -> list[CompactPost] (뒤쪽일수록 최근 사용)
+        self._sizes = {} # job_id -> 바이트 크기 (메모리에 있는 결과만)
+        self._pending = {} # job_id -> list[CompactPost] (메모리에서 빠져 디스크에 쓰는 중인 결과)
+        self._spilled = set() # 디스크에 파일이 있는 job_id
+        self._resident_bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, job_id, posts):
+        """포스트 dict 리스트를 압축 레코드로 저장합니다."""
+        records = [CompactPost.from_dict(post) for post in posts]
+        with self._lock:
+            self._insert(job_id, records)
+            victims = self._pick_victims()
+        self._spill(victims)
+
+    def get(self, job_id):
+        """작업 결과를 dict 리스트로 반환합니다. 디스크에 있으면 다시 읽어옵니다.
+
+        결과가 없거나 스필 파일이 사라졌거나 손상된 경우 None을 반환합니다.
+        """
+        with self._lock:
+            records = self._cache.get(job_id)
+            if records is not None:
+                self._cache.move_to_end(job_id)
+            else:
+                records = self._pending.get(job_id)
+            if records is None and job_id not in self._spilled:
+                return None
+        if records is not None:
+            return [record.to_dict() for record in records]
+
+        try:
+            records = self._load(job_id)
+        except SPILL_LOAD_ERRORS as load_err:
+            logger.error(f"[{job_id}] 디스크 결과 읽기 실패: {load_err}")
+            with self._lock:
+                self._spilled.discard(job_id)
+            self._remove_file(job_id)
+            return None
+
+        victims = []
+        with self._lock:
+            # 읽는 사이 discard()된 작업은 다시 올리지 않음
+            if job_id in self._spilled and job_id not in self._cache:
+                self._insert(job_id, records)
+                victims = self._pick_victims()
+        self._spill(victims)
+        return [record.to_dict() for record in records]
+
+    def discard(self, job_ids):
+        """만료된 작업들의 결과를 메모리와 디스크에서 모두 지웁니다."""
+        removed = []
+        with self._lock:
+            for job_id in job_ids:
+                if job_id in self._cache:
+                    del self._cache[job_id]
+                    self._resident_bytes -= self._sizes.pop(job_id)
+                # 디스크에 쓰는 중인 결과는 _spill()이 쓰기를 마친 뒤 파일을 지움
+                self._pending.pop(job_id, None)
+                if job_id in self._spilled:
+                    self._spilled.discard(job_id)
+                    removed.append(job_id)
+        for job_id in removed:
+            self._remove_file(job_id)
+
+    def close(self):
+        """보관 중인 결과를 모두 버리고 스필 폴더를 삭제합니다. (서버 종료 시)"""
+        with self._lock:
+            self._cache.clear()
+            self._sizes.clear()
+            self._pending.clear()
+            self._spilled.clear()
+            self._resident_bytes = 0
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def _insert(self, job_id, records):
+        if job_id in self._cache:
+            self._resident_bytes -= self._sizes.pop(job_id)
+            del self._cache[job_id]
+        size = result_nbytes(records)
+        self._cache[job_id] = records
+        self._sizes[job_id] = size
+        self._resident_bytes += size
+
+    def _pick_victims(self):
+        """(락을 잡은 상태에서) 예산을 넘는 만큼 오래된 결과를 메모리에서 빼고, 디스크에 써야 할 것을 반환합니다."""
+        victims = []
+        while self._cache and self._resident_bytes > self.memory_budget:
+            job_id, records = self._cache.popitem(last=False)
+            self._resident_bytes -= self._sizes.pop(job_id)
+            # 한 번 내려간 결과는 내용이 바뀌지 않으므로 파일을 다시 쓸 필요 없음
+            if job_id not in self._spilled and job_id not in self._pending:
+                self._pending[job_id] = records
+                victims.append((job_id, records))
+            logger.info(f"[{job_id}] 결과를 디스크로 이동 (메모리 사용량: {self._resident_bytes} bytes)")
+        return victims
+
+    def _spill(self, victims):
+        """(락 밖에서) 메모리에서 빠진 결과를 디스크에 씁니다."""
+        for job_id, records in victims:
+            try:
+                self._dump(job_id, records)
+                written = True
+            except OSError as dump_err:
+                logger.error(f"[{job_id}] 결과를 디스크에 쓰지 못함: {dump_err}")
+                written = False
+            with self._lock:
+                # 쓰는 사이 discard()/close()되지 않았을 때만 디스크 결과로 등록
+                keep = self._pending.pop(job_id, None) is not None and written
+                if keep:
+                    self._spilled.add(job_id)
+            if written and not keep:
+                self._remove_file(job_id)
+
+    def _path(self, job_id):
+        return os.path.join(self.spill_dir, f"{job_id}.pkl")
+
+    def _dump(self, job_id, records):
+        path = self._path(job_id)
+        tmp_path = f"{path}.tmp"
+        # 본문은 이미 zlib으로 압축되어 있으므로 레코드를 그대로 저장 (다시 읽을 때 재압축 없음)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(records, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def _load(self, job_id):
+        logger.info(f"[{job_id}] 디스크에서 결과 다시 읽는 중...")
+        with open(self._path(job_id), "rb") as f:
+            records = pickle.load(f)
+        for record in records:
+            record.keys = _KEY_LAYOUTS.setdefault(record.keys, record.keys)
+        return records
+
+    def _remove_file(self, job_id):
+        try:
+            os.remove(self._path(job_id))
+        except FileNotFoundError:
+            pass
+        except OSError as rm_err:
+            logger.warning(f"[{job_id}] 스필 파일 삭제 실패: {rm_err}")
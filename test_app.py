@@ -0,0 +1,172 @@
+# test_app.py
+import json
+import signal
+import asyncio
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+import uvicorn
+
+import app as app_module
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def isolated_app(monkeypatch, tmp_path):
+    monkeypatch.setattr(app_module, "RESULT_SPILL_DIR", str(tmp_path))
+    monkeypatch.delenv("REPLIT_CALLBACK_URL", raising=False)
+    monkeypatch.delenv("REPLIT_SECRET_KEY", raising=False)
+
+
+@asynccontextmanager
+async def serve():
+    """lifespan을 직접 실행하고 (ASGITransport는 lifespan을 보내지 않음) 앱에 붙은 클라이언트를 돌려줍니다."""
+    async with app_module.lifespan(app_module.app):
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
+
+
+def gated_scraper(monkeypatch, result):
+    """gate가 열릴 때까지 기다렸다가 result를 반환하는 스크래퍼로 바꿉니다."""
+    gate = asyncio.Event()
+
+    async def scraper():
+        await gate.wait()
+        return result
+
+    monkeypatch.setattr(app_module, "run_actual_scraper", scraper)
+    return gate
+
+
+async def start_job(client):
+    response = await client.post("/start-scrape")
+    assert response.status_code == 202
+    return response.json()["job_id"]
+
+
+def sse_frames(body):
+    """SSE 응답 본문을 data 프레임(dict) 목록과 주석 목록으로 나눕니다."""
+    frames, comments = [], []
+    for block in body.split("\n\n"):
+        if block.startswith("data: "):
+            frames.append(json.loads(block[len("data: "):]))
+        elif block.startswith(":"):
+            comments.append(block[1:].strip())
+    return frames, comments
+
+
+async def test_shutdown_closes_open_status_stream(monkeypatch):
+    gated_scraper(monkeypatch, [])
+    async with serve() as client:
+        job_id = await start_job(client)
+        stream = asyncio.create_task(client.get(f"/status/{job_id}"))
+        await asyncio.sleep(0.1)
+        assert not stream.done()
+
+        app_module.request_shutdown()
+        response = await asyncio.wait_for(stream, 5)
+
+    frames, _ = sse_frames(response.text)
+    assert frames[0]["status"] == "running"
+    assert frames[-1] == {"status": "error", "message": "서버가 종료되어 상태 스트림을 닫습니다.", "progress": -1}
+
+
+async def test_exit_signal_notifies_streams_before_connections_drain():
+    server = app_module.ScraperServer(uvicorn.Config(app_module.app))
+    app_module.shutdown_event.clear()
+
+    server.handle_exit(signal.SIGTERM, None)
+    await asyncio.sleep(0)
+
+    assert app_module.shutdown_event.is_set()
+    assert server.should_exit
+    app_module.shutdown_event.clear()
+
+
+async def test_status_stream_follows_job_to_completion(monkeypatch):
+    monkeypatch.setattr(app_module, "SSE_KEEPALIVE_SEC", 0.05)
+    gate = gated_scraper(monkeypatch, [{"logNo": "1", "content": "본문"}])
+    async with serve() as client:
+        job_id = await start_job(client)
+        stream = asyncio.create_task(client.get(f"/status/{job_id}"))
+        await asyncio.sleep(0.2) # 작업이 멈춰 있는 동안 keep-alive 전송
+        gate.set()
+        response = await asyncio.wait_for(stream, 5)
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames, comments = sse_frames(response.text)
+    assert frames[0]["status"] == "running"
+    assert "keep-alive" in comments
+    assert frames[-1] == {"status": "completed", "message": "스크래핑 완료 (1개 포스트 수집)", "progress": 100}
+
+
+async def test_status_stream_for_unknown_job():
+    async with serve() as client:
+        response = await client.get("/status/unknown")
+
+    frames, _ = sse_frames(response.text)
+    assert frames == [{"status": "error", "message": "유효하지 않은 작업 ID입니다.", "progress": -1}]
+
+
+async def test_scraper_error_marks_job_as_error(monkeypatch):
+    async def failing_scraper():
+        raise RuntimeError("로그인 실패")
+
+    monkeypatch.setattr(app_module, "run_actual_scraper", failing_scraper)
+    async with serve() as client:
+        job_id = await start_job(client)
+        status = await client.get(f"/status/{job_id}")
+        result = await client.get(f"/result/{job_id}")
+
+    frames, _ = sse_frames(status.text)
+    assert frames[-1] == {"status": "error", "message": "스크래핑 작업 중 오류: 로그인 실패", "progress": -1}
+    assert result.status_code == 500
+    assert result.json() == {"job_id": job_id, "status": "error", "message": "스크래핑 작업 중 오류: 로그인 실패"}
+
+
+async def test_shutdown_during_callback_keeps_job_completed(monkeypatch):
+    monkeypatch.setenv("REPLIT_CALLBACK_URL", "http://replit.test/callback")
+    monkeypatch.setenv("REPLIT_SECRET_KEY", "secret")
+    gated_scraper(monkeypatch, [{"logNo": "1", "content": "본문"}]).set()
+    callback_started = asyncio.Event()
+
+    async def hanging_post(*args, **kwargs):
+        callback_started.set()
+        await asyncio.Event().wait()
+
+    async with serve() as client:
+        monkeypatch.setattr(app_module.http_client, "post", hanging_post)
+        job_id = await start_job(client)
+        await asyncio.wait_for(callback_started.wait(), 5)
+    # lifespan 종료가 전송 중인 작업 Task를 취소함
+
+    assert app_module.scrape_jobs[job_id]["status"] == "completed"
+
+
+async def test_result_endpoint_status_codes(monkeypatch):
+    posts = [{"blogId": "daisy", "logNo": "1", "title": "제목", "url": "https://blog.naver.com/daisy/1", "date": "2024. 1. 1.", "content": "본문"}]
+    gate = gated_scraper(monkeypatch, posts)
+    async with serve() as client:
+        job_id = await start_job(client)
+
+        pending = await client.get(f"/result/{job_id}")
+        assert pending.status_code == 202
+        assert pending.json()["message"] == "작업이 아직 진행 중입니다."
+
+        gate.set()
+        await client.get(f"/status/{job_id}") # 작업이 끝나면 스트림이 닫힘
+        completed = await client.get(f"/result/{job_id}")
+        assert completed.status_code == 200
+        assert completed.json() == {"job_id": job_id, "status": "completed", "result": posts}
+
+        missing = await client.get("/result/unknown")
+        assert missing.status_code == 404
+        assert missing.json() == {"error": "유효하지 않은 작업 ID입니다."}
@@ -0,0 +1,165 @@
+# test_result_store.py
+import os
+import threading
+
+from result_store import CompactPost, JobResultStore, result_nbytes
+
+
+def make_posts(blog_id, count, content_size=2000):
+    """BlogScraper.main()이 반환하는 포스트와 같은 형태 ({**meta, "content": ...})"""
+    posts = []
+    for i in range(count):
+        log_no = str(220000000 + i)
+        meta = {
+            "blogId": blog_id,
+            "logNo": log_no,
+            "title": f"제목 {i}",
+            "url": f"https://blog.naver.com/{blog_id}/{log_no}",
+            "date": "2024. 1. 1.",
+        }
+        posts.append({**meta, "content": f"본문 {i} " + os.urandom(content_size).hex()})
+    return posts
+
+
+def budget_for(posts, jobs):
+    """posts 크기의 결과를 jobs개까지 메모리에 둘 수 있는 예산"""
+    return result_nbytes([CompactPost.from_dict(post) for post in posts]) * jobs
+
+
+def spill_files(store):
+    return sorted(os.listdir(store.spill_dir))
+
+
+def test_scraper_post_shape_derives_url():
+    post = make_posts("daisy", 1)[0]
+    record = CompactPost.from_dict(post)
+
+    assert record.extra is None # url은 blogId + logNo로 재구성되므로 따로 보관하지 않음
+    assert record.url == post["url"]
+    assert record.to_dict() == post
+    assert list(record.to_dict()) == list(post)
+
+
+def test_compact_post_keeps_only_input_keys():
+    assert CompactPost.from_dict({"error": "스크래퍼 모듈 로드 실패"}).to_dict() == {"error": "스크래퍼 모듈 로드 실패"}
+    assert CompactPost.from_dict({"logNo": "1", "content": None}).to_dict() == {"logNo": "1", "content": None}
+
+
+def test_compact_post_keeps_url_that_cannot_be_derived():
+    post = {"blogId": "daisy", "logNo": "1", "url": "https://blog.naver.com/PostView.naver?blogId=daisy&logNo=1"}
+    assert CompactPost.from_dict(post).to_dict() == post
+
+
+def test_put_get_in_memory(tmp_path):
+    store = JobResultStore(10 * 1024 * 1024, tmp_path)
+    posts = make_posts("daisy", 3)
+    store.put("job", posts)
+
+    assert store.get("job") == posts
+    assert spill_files(store) == []
+    assert store.get("missing") is None
+
+
+def test_evicts_least_recently_used_first(tmp_path):
+    posts = make_posts("daisy", 2)
+    store = JobResultStore(budget_for(posts, 2), tmp_path)
+    store.put("a", posts)
+    store.put("b", posts)
+    store.get("a") # a를 최근 사용으로 만듦
+    store.put("c", posts)
+
+    assert spill_files(store) == ["b.pkl"]
+    assert store.get("b") == posts
+
+
+def test_job_larger_than_budget_is_spilled_immediately(tmp_path):
+    store = JobResultStore(1, tmp_path)
+    posts = make_posts("daisy", 2)
+    store.put("big", posts)
+
+    assert spill_files(store) == ["big.pkl"]
+    assert store.get("big") == posts
+
+
+def test_get_after_spill_returns_identical_dicts(tmp_path):
+    store = JobResultStore(1, tmp_path)
+    posts = make_posts("daisy", 3) + [{"error": "스크래퍼 모듈 로드 실패"}]
+    store.put("job", posts)
+
+    result = store.get("job")
+    assert result == posts
+    assert result[0]["url"] == "https://blog.naver.com/daisy/220000000"
+    # 스필 파일은 다시 쓰지 않고 재사용
+    assert store.get("job") == posts
+    assert spill_files(store) == ["job.pkl"]
+
+
+def test_missing_or_corrupt_spill_file_returns_none(tmp_path):
+    store = JobResultStore(1, tmp_path)
+    store.put("gone", make_posts("daisy", 1))
+    store.put("broken", make_posts("daisy", 1))
+
+    os.remove(os.path.join(store.spill_dir, "gone.pkl"))
+    with open(os.path.join(store.spill_dir, "broken.pkl"), "wb") as f:
+        f.write(b"not a pickle")
+
+    for _ in range(2):
+        assert store.get("gone") is None
+        assert store.get("broken") is None
+    assert spill_files(store) == []
+
+
+def test_discard_removes_memory_and_spill_file(tmp_path):
+    posts = make_posts("daisy", 1)
+    store = JobResultStore(budget_for(posts, 1), tmp_path)
+    store.put("old", posts)
+    store.put("new", posts)
+    assert spill_files(store) == ["old.pkl"]
+
+    store.discard(["old", "new"])
+    assert store.get("old") is None
+    assert store.get("new") is None
+    assert spill_files(store) == []
+
+    # 지운 만큼 예산이 비었으므로 새 결과는 디스크로 내려가지 않음
+    store.put("again", posts)
+    assert spill_files(store) == []
+
+
+def test_memory_hit_does_not_wait_for_spill(tmp_path):
+    posts = make_posts("daisy", 1)
+    store = JobResultStore(budget_for(posts, 1), tmp_path)
+    store.put("hot", posts)
+
+    dump_started = threading.Event()
+    release_dump = threading.Event()
+    original_dump = store._dump
+
+    def slow_dump(job_id, records):
+        dump_started.set()
+        release_dump.wait(5)
+        original_dump(job_id, records)
+
+    store._dump = slow_dump
+    writer = threading.Thread(target=store.put, args=("cold", posts))
+    writer.start()
+    try:
+        assert dump_started.wait(5)
+        # "hot"을 디스크에 쓰는 동안에도 조회는 바로 응답 (쓰는 중인 결과 포함)
+        assert store.get("cold") == posts
+        assert store.get("hot") == posts
+    finally:
+        release_dump.set()
+        writer.join(5)
+    assert spill_files(store) == ["hot.pkl"]
+
+
+def test_spill_dir_is_per_process_and_removed_on_close(tmp_path):
+    first = JobResultStore(1, tmp_path)
+    second = JobResultStore(1, tmp_path)
+    assert first.spill_dir != second.spill_dir
+
+    first.put("job", make_posts("daisy", 1))
+    first.close()
+    assert not os.path.exists(first.spill_dir)
+    assert os.path.isdir(second.spill_dir)